@@ -6,11 +6,18 @@ Scrapes dance-related events from Chaillot - Théâtre national de la Danse:
 https://theatre-chaillot.fr/fr/programmation
 
 It fetches the events, expands date ranges, summarizes with OpenAI, 
-and uploads to Airtable.
+and uploads to Airtable. Every event is checked against the local event
+store first: unchanged events reuse their summary and are skipped, changed
+ones update their existing Airtable record.
+
+Run with --compact to upload one event record per show (with its date
+ranges) plus one lightweight occurrence row per date, instead of one full
+row per date.
 """
 
 import os
 import re
+import sys
 import requests
 import openai
 import locale
@@ -22,6 +29,8 @@ from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 # For the new OpenAI library usage
 from openai import OpenAI
+from event_records import listing_fingerprint, occurrence_rows
+from event_store import EventStore, sync_compact_event, sync_row
 
 # Load environment variables
 load_dotenv()
@@ -48,6 +57,9 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
 AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID")
 AIRTABLE_TABLE_NAME = os.getenv("AIRTABLE_TABLE_NAME")
+# Only needed for --compact: one record per show, plus per-date rows linked to it
+AIRTABLE_EVENTS_TABLE_NAME = os.getenv("AIRTABLE_EVENTS_TABLE_NAME", "Events")
+AIRTABLE_OCCURRENCES_TABLE_NAME = os.getenv("AIRTABLE_OCCURRENCES_TABLE_NAME", "Occurrences")
 
 if not (OPENAI_API_KEY and AIRTABLE_API_KEY and AIRTABLE_BASE_ID and AIRTABLE_TABLE_NAME):
     logging.critical("Missing required environment variables. Check .env file.")
@@ -98,25 +110,83 @@ class DanceEventsSummarize:
             print(f"[ERROR] OpenAI API call failed: {e}")
             return "Error in generating summary."
 
+# One pooled HTTP session for the whole run (keeps TCP/TLS connections alive)
+session = requests.Session()
+
+# Name of this scraper in the local event store
+STORE_SOURCE = "chaillot"
+
 # Airtable configuration
 BASE_URL = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{AIRTABLE_TABLE_NAME}"
+EVENTS_URL = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{AIRTABLE_EVENTS_TABLE_NAME}"
+OCCURRENCES_URL = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{AIRTABLE_OCCURRENCES_TABLE_NAME}"
 AIRTABLE_HEADERS = {
     "Authorization": f"Bearer {AIRTABLE_API_KEY}",
     "Content-Type": "application/json",
 }
 
-def upload_to_airtable(record_data: dict):
-    """Uploads a single event record to Airtable."""
+def upload_to_airtable(record_data: dict, url: str = BASE_URL, record_id: str = None):
+    """
+    Uploads a single event record to the Airtable table at `url`, updating
+    `record_id` in place when given. Returns the record id, or None.
+    """
     event_name = record_data.get("Event Name", "No Name")
     logging.debug(f"Uploading to Airtable: {event_name}")
     try:
-        response = requests.post(BASE_URL, headers=AIRTABLE_HEADERS, json={"fields": record_data}, timeout=15)
+        if record_id:
+            response = session.patch(f"{url}/{record_id}", headers=AIRTABLE_HEADERS, json={"fields": record_data}, timeout=15)
+            if response.status_code == 404:
+                logging.warning(f"Record {record_id} was deleted in Airtable, uploading {event_name} again")
+                response = session.post(url, headers=AIRTABLE_HEADERS, json={"fields": record_data}, timeout=15)
+        else:
+            response = session.post(url, headers=AIRTABLE_HEADERS, json={"fields": record_data}, timeout=15)
         if response.status_code in [200, 201]:
             logging.info(f"Successfully uploaded: {event_name}")
+            return response.json().get("id")
         else:
             logging.error(f"Airtable upload failed: {response.status_code} - {response.text}")
     except Exception as e:
         logging.error(f"Exception during Airtable upload: {e}")
+    return None
+
+def upload_occurrences_to_airtable(event_record_id: str, event_dates: list) -> dict:
+    """
+    Uploads the per-date occurrence rows for a compact event record, 10 per request.
+    Returns {date: record id} for the rows Airtable accepted.
+    """
+    accepted = {}
+    rows = occurrence_rows(event_record_id, event_dates)
+    for i in range(0, len(rows), 10):  # Airtable accepts at most 10 records per request
+        batch = [{"fields": row} for row in rows[i:i + 10]]
+        try:
+            response = session.post(OCCURRENCES_URL, headers=AIRTABLE_HEADERS, json={"records": batch}, timeout=15)
+            if response.status_code in [200, 201]:
+                for record in response.json().get("records", []):
+                    accepted[record["fields"]["Date"]] = record["id"]
+            else:
+                logging.error(f"Airtable occurrence upload failed: {response.status_code} - {response.text}")
+        except Exception as e:
+            logging.error(f"Exception during Airtable occurrence upload: {e}")
+    return accepted
+
+def delete_occurrences_from_airtable(record_ids: list) -> list:
+    """Deletes occurrence rows for dates dropped from a show, 10 per request. Returns the deleted ids."""
+    deleted = []
+    for i in range(0, len(record_ids), 10):
+        batch = record_ids[i:i + 10]
+        try:
+            response = session.delete(OCCURRENCES_URL, headers=AIRTABLE_HEADERS, params={"records[]": batch}, timeout=15)
+            if response.status_code == 200:
+                deleted.extend(record["id"] for record in response.json().get("records", []) if record.get("deleted"))
+            else:
+                logging.error(f"Airtable occurrence delete failed: {response.status_code} - {response.text}")
+        except Exception as e:
+            logging.error(f"Exception during Airtable occurrence delete: {e}")
+    return deleted
+
+def upload_compact_event(event_fields: dict, record_id: str = None):
+    """Uploads (or updates) one show's record in the Events table. Returns its record id, or None."""
+    return upload_to_airtable(event_fields, url=EVENTS_URL, record_id=record_id)
 
 def parse_date_range(times_list: list):
     """Parses a list of <time> elements and returns a list of date objects."""
@@ -148,7 +218,7 @@ def scrape_detail_page(url: str) -> str:
     """Fetches additional details from the event's detail page."""
     logging.debug(f"Fetching details from: {url}")
     try:
-        response = requests.get(url, timeout=15)
+        response = session.get(url, timeout=15)
         response.raise_for_status()
         soup = BeautifulSoup(response.content, "html.parser")
         description = soup.find("div", class_="performances-detail-text") or soup.find("main")
@@ -157,103 +227,144 @@ def scrape_detail_page(url: str) -> str:
         logging.error(f"Error fetching detail page {url}: {e}")
         return ""
 
-def main():
-    summarizer = DanceEventsSummarize()
+def render_listing(browser, listing_url: str):
+    """Renders the JS listing page in a new tab of `browser` and returns its HTML, or None."""
+    page = browser.new_page()
+    try:
+        page.goto(listing_url, timeout=30000)
+        logging.debug("Waiting for event cards to load...")
+        page.wait_for_selector("a.card.posters__item.group.flex.flex-col.h-full.animated-scall", timeout=20000)
+        return page.content()
+    except Exception as e:
+        logging.error(f"Timeout or error waiting for event cards: {e}")
+        return None
+    finally:
+        page.close()
+
+def main(compact=False, summarizer=None, browser=None, store=None):
+    """
+    Scrapes and uploads the Chaillot programme. Returns a fingerprint of the
+    listing (None on failure) so a scheduler can tell whether it changed.
+    `summarizer`, `browser` and `store` may be passed in to reuse warm instances.
+    """
+    if browser is None:
+        with sync_playwright() as p:
+            logging.debug("Launching Playwright browser...")
+            browser = p.chromium.launch(headless=True)  # Set to False for debugging
+            return main(compact=compact, summarizer=summarizer, browser=browser, store=store)
+
+    summarizer = summarizer or DanceEventsSummarize()
+    store = store or EventStore()
     base_url = "https://theatre-chaillot.fr"
     listing_url = f"{base_url}/fr/programmation"
 
     logging.info(f"Fetching listing page: {listing_url}")
 
-    with sync_playwright() as p:
-        logging.debug("Launching Playwright browser...")
-        browser = p.chromium.launch(headless=True)  # Set to False for debugging
-        page = browser.new_page()
-        page.goto(listing_url, timeout=30000)
-
-        logging.debug("Waiting for event cards to load...")
-        try:
-            page.wait_for_selector("a.card.posters__item.group.flex.flex-col.h-full.animated-scall", timeout=20000)
-            rendered_html = page.content()
-        except Exception as e:
-            logging.error(f"Timeout or error waiting for event cards: {e}")
-            return
-
-        with open("chaillot_rendered_playwright.html", "w", encoding="utf-8") as f:
-            f.write(rendered_html)
-
-        soup = BeautifulSoup(rendered_html, "html.parser")
-        event_cards = soup.find_all("a", class_=re.compile(r"card.*posters__item.*group.*"))
-
-        if not event_cards:
-            logging.warning("No event cards found. Check HTML file for issues.")
-            return
-
-        logging.info(f"Found {len(event_cards)} event cards.")
+    rendered_html = render_listing(browser, listing_url)
+    if not rendered_html:
+        return None
 
-        for idx, card in enumerate(event_cards, start=1):
-            logging.debug(f"Processing event card {idx}...")
+    with open("chaillot_rendered_playwright.html", "w", encoding="utf-8") as f:
+        f.write(rendered_html)
 
-            href = card.get("href")
-            if not href:
-                logging.warning("Event card missing href. Skipping...")
-                continue
-            event_url = href if href.startswith("http") else f"{base_url}{href}"
+    soup = BeautifulSoup(rendered_html, "html.parser")
+    event_cards = soup.find_all("a", class_=re.compile(r"card.*posters__item.*group.*"))
 
-            h3 = card.find("h3")
-            if not h3:
-                logging.warning(f"No title found for event card {idx}. Skipping...")
-                continue
+    if not event_cards:
+        logging.warning("No event cards found. Check HTML file for issues.")
+        return None
 
-            show_title = h3.get_text(strip=True)
-            logging.debug(f"Found event title: {show_title}")
+    logging.info(f"Found {len(event_cards)} event cards.")
+    fingerprint = listing_fingerprint(
+        f"{card.get('href')} {card.get_text(' ', strip=True)}" for card in event_cards
+    )
+
+    for idx, card in enumerate(event_cards, start=1):
+        logging.debug(f"Processing event card {idx}...")
+
+        href = card.get("href")
+        if not href:
+            logging.warning("Event card missing href. Skipping...")
+            continue
+        event_url = href if href.startswith("http") else f"{base_url}{href}"
+
+        h3 = card.find("h3")
+        if not h3:
+            logging.warning(f"No title found for event card {idx}. Skipping...")
+            continue
+
+        show_title = h3.get_text(strip=True)
+        logging.debug(f"Found event title: {show_title}")
+
+        date_li = card.find("li", class_="date")
+        if not date_li:
+            logging.warning(f"No date found for event: {show_title}. Skipping...")
+            continue
+
+        time_tags = date_li.find_all("time")
+        event_dates = parse_date_range(time_tags)
+        if not event_dates:
+            logging.warning(f"Unable to parse dates for event: {show_title}. Skipping...")
+            continue
+
+        location_li = date_li.find_next_sibling("li")
+        location = location_li.get_text(strip=True) if location_li else "Chaillot"
+
+        image_div = card.find("div", class_="posters__item-image")
+        image_url = ""
+        if image_div:
+            img_tag = image_div.find("img")
+            if img_tag:
+                # Construct the absolute URL for the image
+                image_src = img_tag.get("data-src") or img_tag.get("src")
+                if image_src:
+                    if image_src.startswith("http"):
+                        image_url = image_src
+                    else:
+                        image_url = f"{base_url}{image_src}"
+
+        logging.debug(f"Extracted image URL: {image_url}")
+
+        details_txt = scrape_detail_page(event_url)
+        summary = store.cached_summary(STORE_SOURCE, event_url, details_txt)
+        if summary is None:
+            summary = summarizer.get_completion(details_txt) if details_txt else "No summary available."
 
-            date_li = card.find("li", class_="date")
-            if not date_li:
-                logging.warning(f"No date found for event: {show_title}. Skipping...")
-                continue
+        if compact:
+            record_data = {
+                "Event Name": show_title,
+                "Location": location,
+                "Venue URL": base_url,
+                "Image URL": image_url,
+                "Summary": summary,
+                "Details URL": event_url
+            }
+            sync_compact_event(
+                store, STORE_SOURCE, record_data, event_dates, details_txt,
+                upload_compact_event, upload_occurrences_to_airtable, delete_occurrences_from_airtable,
+            )
+            continue
 
-            time_tags = date_li.find_all("time")
-            event_dates = parse_date_range(time_tags)
-            if not event_dates:
-                logging.warning(f"Unable to parse dates for event: {show_title}. Skipping...")
+        for event_date in event_dates:
+            date_str = format_date_to_yyyy_mm_dd(str(event_date))  # Ensure date is formatted correctly
+            if not date_str:
+                logging.warning(f"Skipping invalid date for event {show_title}")
                 continue
+            record_data = {
+                "Date": date_str,
+                "Event Name": show_title,
+                "Location": location,
+                "Venue URL": base_url,
+                "Image URL": image_url,
+                "Summary": summary,
+                "Details URL": event_url
+            }
+            sync_row(
+                store, STORE_SOURCE, date_str, record_data, details_txt,
+                lambda fields, record_id: upload_to_airtable(fields, record_id=record_id),
+            )
 
-            location_li = date_li.find_next_sibling("li")
-            location = location_li.get_text(strip=True) if location_li else "Chaillot"
-
-            image_div = card.find("div", class_="posters__item-image")
-            image_url = ""
-            if image_div:
-                img_tag = image_div.find("img")
-                if img_tag:
-                    # Construct the absolute URL for the image
-                    image_src = img_tag.get("data-src") or img_tag.get("src")
-                    if image_src:
-                        if image_src.startswith("http"):
-                            image_url = image_src
-                        else:
-                            image_url = f"{base_url}{image_src}"
-
-            logging.debug(f"Extracted image URL: {image_url}")
-
-            details_txt = scrape_detail_page(event_url)
-            summary = summarizer.get_completion(details_txt) if details_txt else "No summary available."
-
-            for event_date in event_dates:
-                date_str = format_date_to_yyyy_mm_dd(str(event_date))  # Ensure date is formatted correctly
-                if not date_str:
-                    logging.warning(f"Skipping invalid date for event {show_title}")
-                    continue
-                record_data = {
-                    "Date": date_str,
-                    "Event Name": show_title,
-                    "Location": location,
-                    "Venue URL": base_url,
-                    "Image URL": image_url,
-                    "Summary": summary,
-                    "Details URL": event_url
-                }
-                upload_to_airtable(record_data)
+    return fingerprint
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(compact="--compact" in sys.argv[1:])
\ No newline at end of file
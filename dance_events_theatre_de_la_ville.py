@@ -13,6 +13,9 @@ from dotenv import load_dotenv
 # For the new openai library usage
 from openai import OpenAI
 
+from event_records import listing_fingerprint, occurrence_rows
+from event_store import EventStore, sync_compact_event, sync_row
+
 # -------------------------------------------------------------------
 # 1) LOAD ENV + LOCALE
 # -------------------------------------------------------------------
@@ -27,12 +30,24 @@ AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY", "YOUR_AIRTABLE_KEY")
 BASE_ID = "appMlyQoIVpWTzj79"
 TABLE_NAME = "tblzZL41j94BPih1Q"
 API_URL = f"https://api.airtable.com/v0/{BASE_ID}/{TABLE_NAME}"
+# Only used with --compact: one record per show in the Events table,
+# plus per-date rows in the Occurrences table linked to it
+EVENTS_TABLE_NAME = os.getenv("AIRTABLE_EVENTS_TABLE_NAME", "Events")
+EVENTS_API_URL = f"https://api.airtable.com/v0/{BASE_ID}/{EVENTS_TABLE_NAME}"
+OCCURRENCES_TABLE_NAME = os.getenv("AIRTABLE_OCCURRENCES_TABLE_NAME", "Occurrences")
+OCCURRENCES_API_URL = f"https://api.airtable.com/v0/{BASE_ID}/{OCCURRENCES_TABLE_NAME}"
 
 AIRTABLE_HEADERS = {
     "Authorization": f"Bearer {AIRTABLE_API_KEY}",
     "Content-Type": "application/json",
 }
 
+# One pooled HTTP session for every request (keeps TCP/TLS connections alive)
+session = requests.Session()
+
+# Name of this scraper in the local event store
+STORE_SOURCE = "theatre-de-la-ville"
+
 # -------------------------------------------------------------------
 # 3) SUMMARIZER CLASS
 # -------------------------------------------------------------------
@@ -86,7 +101,7 @@ def fetch_event_details(url: str):
     Fetch the detail page and parse out name, text, venue, etc.
     """
     print(f"[DEBUG] Fetching details from event URL: {url}")
-    resp = requests.get(url)
+    resp = session.get(url, timeout=15)
     if not resp.ok:
         print(f"[ERROR] Failed to fetch event URL: {resp.status_code}")
         return None, None, None, None
@@ -122,13 +137,20 @@ def fetch_event_details(url: str):
 # -------------------------------------------------------------------
 # 5) HELPER: UPLOAD TO AIRTABLE
 # -------------------------------------------------------------------
-def upload_to_airtable(data: dict):
+def upload_to_airtable(data: dict, url: str = API_URL, record_id: str = None):
     """
-    Upload a single event record to Airtable.
+    Upload a single event record to the Airtable table at `url`,
+    or update `record_id` in place when given.
     """
     print(f"[DEBUG] Uploading to Airtable: {data.get('Event Name', 'No event name')}")
     try:
-        response = requests.post(API_URL, headers=AIRTABLE_HEADERS, json={"fields": data})
+        if record_id:
+            response = session.patch(f"{url}/{record_id}", headers=AIRTABLE_HEADERS, json={"fields": data}, timeout=15)
+            if response.status_code == 404:
+                print(f"[WARNING] Record {record_id} was deleted in Airtable, uploading again")
+                response = session.post(url, headers=AIRTABLE_HEADERS, json={"fields": data}, timeout=15)
+        else:
+            response = session.post(url, headers=AIRTABLE_HEADERS, json={"fields": data}, timeout=15)
         print(f"[DEBUG] Airtable response status: {response.status_code}")
         return response.json()
     except Exception as e:
@@ -136,6 +158,55 @@ def upload_to_airtable(data: dict):
         return {"error": str(e)}
 
 
+def upload_compact_event(event_fields: dict, record_id: str = None):
+    """
+    Upload (or update) one show's record, carrying its date ranges, in the Events table.
+    Returns its record id, or None.
+    """
+    result = upload_to_airtable(event_fields, url=EVENTS_API_URL, record_id=record_id)
+    if not result.get("id"):
+        print(f"[ERROR] Compact event upload failed: {result}")
+    return result.get("id")
+
+
+def upload_occurrences(event_record_id: str, event_dates: list) -> dict:
+    """
+    Upload one lightweight occurrence row per date, linked to the event record
+    (Airtable takes 10 records per request). Returns {date: record id} for accepted rows.
+    """
+    accepted = {}
+    rows = occurrence_rows(event_record_id, event_dates)
+    for i in range(0, len(rows), 10):
+        batch = [{"fields": row} for row in rows[i:i + 10]]
+        try:
+            response = session.post(OCCURRENCES_API_URL, headers=AIRTABLE_HEADERS, json={"records": batch}, timeout=15)
+            print(f"[DEBUG] Airtable occurrences response status: {response.status_code}")
+            if response.ok:
+                for record in response.json().get("records", []):
+                    accepted[record["fields"]["Date"]] = record["id"]
+        except Exception as e:
+            print(f"[ERROR] Failed to upload occurrences to Airtable: {e}")
+    return accepted
+
+
+def delete_occurrences(record_ids: list) -> list:
+    """
+    Delete occurrence rows for dates dropped from a show (10 per request).
+    Returns the ids Airtable confirmed as deleted.
+    """
+    deleted = []
+    for i in range(0, len(record_ids), 10):
+        batch = record_ids[i:i + 10]
+        try:
+            response = session.delete(OCCURRENCES_API_URL, headers=AIRTABLE_HEADERS, params={"records[]": batch}, timeout=15)
+            print(f"[DEBUG] Airtable occurrences delete status: {response.status_code}")
+            if response.ok:
+                deleted.extend(record["id"] for record in response.json().get("records", []) if record.get("deleted"))
+        except Exception as e:
+            print(f"[ERROR] Failed to delete occurrences from Airtable: {e}")
+    return deleted
+
+
 # -------------------------------------------------------------------
 # 6) HELPER: PARSE EVENT DATE
 # -------------------------------------------------------------------
@@ -189,8 +260,15 @@ def parse_event_date(raw_date_str: str):
 # 7) MAIN SCRAPER
 # -------------------------------------------------------------------
 
-def main(start_date_str=None):
-    summarizer = DanceEventsSummarize()
+def main(start_date_str=None, compact=False, summarizer=None, store=None):
+    """
+    Returns a fingerprint of the listing page (None on failure) so a
+    scheduler can tell whether it changed. Pass `summarizer` / `store` to reuse them.
+    Only events that are new or changed since the last run (per the local
+    event store) are pushed; changed ones update their existing Airtable record.
+    """
+    summarizer = summarizer or DanceEventsSummarize()
+    store = store or EventStore()
 
     # Decide start date
     if start_date_str:
@@ -204,14 +282,15 @@ def main(start_date_str=None):
     base_url = "https://www.theatredelaville-paris.com/fr/spectacles/saison-24-25/danse"
     print(f"[DEBUG] Requesting base URL: {base_url}")
 
-    resp = requests.get(base_url)
+    resp = session.get(base_url, timeout=15)
     if not resp.ok:
         print(f"[ERROR] Failed to get base URL: {resp.status_code}")
-        return
+        return None
 
     soup = BeautifulSoup(resp.content, "html.parser")
     events = soup.find_all("article", class_="event-item layout-horizontal page-block")
     print(f"[DEBUG] Found {len(events)} events on the page.")
+    fingerprint = listing_fingerprint(evt.get_text(" ", strip=True) for evt in events)
 
     # Loop over found events
     for evt in events:
@@ -236,8 +315,26 @@ def main(start_date_str=None):
         if not details_txt:
             continue
 
-        # Summarize with the new style
-        summary_txt = summarizer.get_completion(details_txt)
+        # Summarize with the new style, reusing the stored summary if the detail page hasn't changed
+        summary_txt = store.cached_summary(STORE_SOURCE, event_url, details_txt)
+        if summary_txt is None:
+            summary_txt = summarizer.get_completion(details_txt)
+
+        if compact:
+            event_data = {
+                "Event Name": entry_name,
+                "Location": venue_name,
+                "Venue URL": venue_url,
+                "Details URL": event_url,
+                "Summary": summary_txt,
+                "Image URL": image_url,
+            }
+            print(f"[DEBUG] Syncing compact event: {entry_name} ({len(event_dates)} dates)")
+            sync_compact_event(
+                store, STORE_SOURCE, event_data, event_dates, details_txt,
+                upload_compact_event, upload_occurrences, delete_occurrences,
+            )
+            continue
 
         # Upload a row for each date
         for event_date in event_dates:
@@ -251,11 +348,14 @@ def main(start_date_str=None):
                 "Image URL": image_url,
             }
 
-            print(f"[DEBUG] Preparing to upload event: {entry_name} on {event_date}")
-            result = upload_to_airtable(event_data)
-            print(f"[DEBUG] Airtable upload result: {result}")
+            print(f"[DEBUG] Syncing event: {entry_name} on {event_date}")
+            sync_row(
+                store, STORE_SOURCE, event_date, event_data, details_txt,
+                lambda fields, record_id: upload_to_airtable(fields, record_id=record_id).get("id"),
+            )
 
     print("[DEBUG] Finished processing all events.")
+    return fingerprint
 
 # -------------------------------------------------------------------
 # 8) ENTRY POINT
@@ -263,5 +363,6 @@ def main(start_date_str=None):
 if __name__ == "__main__":
     
 
-    start_arg = sys.argv[1] if len(sys.argv) > 1 else None
-    main(start_arg)
\ No newline at end of file
+    args = [a for a in sys.argv[1:] if a != "--compact"]
+    start_arg = args[0] if args else None
+    main(start_arg, compact="--compact" in sys.argv[1:])
\ No newline at end of file
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+event_records.py
+
+Compact, run-length representation of scraped events.
+
+Instead of one full Airtable row per performance date, an event is stored
+once with its date ranges (e.g. "2025-01-06/2025-01-18, 2025-01-20"), plus
+one lightweight occurrence row per date that links back to it.
+DateIndex gives the website/export side a fast "events on date X" lookup;
+export_events.py builds one from the Airtable Events table.
+"""
+
+import hashlib
+from datetime import date, datetime, timedelta
+
+
+def to_date(value) -> date:
+    """Accepts a date, datetime or 'YYYY-MM-DD...' string and returns a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def date_ranges(dates) -> list:
+    """Collapses a collection of dates into sorted (start, end) runs of consecutive days."""
+    days = sorted({to_date(d) for d in dates})
+    ranges = []
+    for day in days:
+        if ranges and day - ranges[-1][1] == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], day)
+        else:
+            ranges.append((day, day))
+    return ranges
+
+
+def format_date_ranges(ranges) -> str:
+    """Formats (start, end) runs as 'YYYY-MM-DD/YYYY-MM-DD, YYYY-MM-DD'."""
+    parts = []
+    for start, end in ranges:
+        if start == end:
+            parts.append(start.isoformat())
+        else:
+            parts.append(f"{start.isoformat()}/{end.isoformat()}")
+    return ", ".join(parts)
+
+
+def parse_date_ranges(ranges_str: str) -> list:
+    """Inverse of format_date_ranges."""
+    ranges = []
+    for part in (ranges_str or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition("/")
+        start = date.fromisoformat(start)
+        ranges.append((start, date.fromisoformat(end) if end else start))
+    return ranges
+
+
+def build_compact_event(fields: dict, dates) -> dict:
+    """
+    Builds the single event record for a run of dates.
+    `fields` is the usual per-date record without "Date".
+    """
+    ranges = date_ranges(dates)
+    event_fields = {k: v for k, v in fields.items() if k != "Date"}
+    if ranges:
+        event_fields["Date Ranges"] = format_date_ranges(ranges)
+        event_fields["First Date"] = ranges[0][0].isoformat()
+        event_fields["Last Date"] = ranges[-1][1].isoformat()
+    return event_fields
+
+
+def occurrence_rows(event_record_id: str, dates) -> list:
+    """One lightweight row per date, linked to the event record."""
+    return [
+        {"Date": day.isoformat(), "Event": [event_record_id]}
+        for day in sorted({to_date(d) for d in dates})
+    ]
+
+
+def listing_fingerprint(items) -> str:
+    """Order-insensitive sha256 over the text of a listing's items, to detect listing changes."""
+    digest = hashlib.sha256()
+    for item in sorted(str(i) for i in items):
+        digest.update(item.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def window_fingerprint(listings) -> str:
+    """
+    Fingerprint of a date-window scrape, given (date, details URL) pairs.
+    Only which shows are listed counts, not on which days: a window that
+    moves forward a day gives the same fingerprint for an unchanged listing.
+    """
+    return listing_fingerprint({details_url for _, details_url in listings})
+
+
+class DateIndex:
+    """
+    In-memory "events on date X" index over compact event records.
+
+    Each record only needs a "Date Ranges" field; the rest is kept as-is.
+    """
+
+    def __init__(self, events=()):
+        self.events = []
+        self._by_date = {}
+        for event in events:
+            self.add(event)
+
+    def add(self, event: dict):
+        idx = len(self.events)
+        self.events.append(event)
+        for start, end in parse_date_ranges(event.get("Date Ranges", "")):
+            day = start
+            while day <= end:
+                self._by_date.setdefault(day, []).append(idx)
+                day += timedelta(days=1)
+
+    def events_on(self, day) -> list:
+        return [self.events[i] for i in self._by_date.get(to_date(day), [])]
+
+    def events_between(self, start, end) -> list:
+        """Events occurring at least once in [start, end], each listed once."""
+        start, end = to_date(start), to_date(end)
+        seen = set()
+        day = start
+        while day <= end:
+            seen.update(self._by_date.get(day, []))
+            day += timedelta(days=1)
+        return [self.events[i] for i in sorted(seen)]
+
+    def to_dict(self, start=None, end=None) -> dict:
+        """
+        JSON-friendly payload: each event once, plus date -> event indexes.
+        With `start`/`end`, only dates in that window (and their events) are kept.
+        """
+        start = to_date(start) if start else date.min
+        end = to_date(end) if end else date.max
+        by_date = {d: idxs for d, idxs in sorted(self._by_date.items()) if start <= d <= end}
+        kept = sorted({i for idxs in by_date.values() for i in idxs})
+        position = {old: new for new, old in enumerate(kept)}
+        return {
+            "events": [self.events[i] for i in kept],
+            "by_date": {d.isoformat(): [position[i] for i in idxs] for d, idxs in by_date.items()},
+        }
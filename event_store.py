@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+event_store.py
+
+Local SQLite store of every scraped event. All scrapers check it before
+uploading to Airtable and update it once Airtable has accepted a record.
+Rows are keyed by (source, details URL, date, output mode) and indexed by
+date. Each row keeps a fingerprint of the detail text, summary and image,
+plus the Airtable record id it was uploaded as, so a run can:
+
+- reuse the stored summary when the detail text hasn't changed (no OpenAI call),
+- push only rows that are new (POST) or whose content changed (PATCH of the
+  existing Airtable record, instead of a duplicate).
+
+The output mode is part of the key because per-date rows and --compact
+records live in different Airtable tables: switching modes uploads
+everything once to the new tables.
+
+It also answers date-window queries locally, without the Airtable API:
+
+    python3 event_store.py 2025-01-06 2025-01-12
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from event_records import build_compact_event, to_date
+
+# Output modes: one main-table row per date, or --compact Events/Occurrences records
+ROWS = "rows"
+COMPACT = "compact"
+
+# What the scrapers upload when no real summary could be made. Uploaded so the show
+# still reaches the site, but never cached: rows saved with one get RETRY_FINGERPRINT,
+# which never matches, so the next run summarizes and pushes them again.
+PLACEHOLDER_SUMMARIES = {"Error in generating summary.", "No summary available."}
+RETRY_FINGERPRINT = "retry"
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    source            TEXT NOT NULL,
+    details_url       TEXT NOT NULL,
+    date              TEXT NOT NULL,  -- YYYY-MM-DD
+    mode              TEXT NOT NULL,  -- 'rows' or 'compact'
+    event_name        TEXT,
+    location          TEXT,
+    venue_url         TEXT,
+    image_url         TEXT,
+    summary           TEXT,
+    details_hash      TEXT NOT NULL,
+    fingerprint       TEXT NOT NULL,
+    airtable_id       TEXT,  -- main-table row (rows) or Occurrences row (compact)
+    event_airtable_id TEXT,  -- compact only: the show's Events-table record
+    first_seen        TEXT NOT NULL,
+    updated_at        TEXT NOT NULL,
+    PRIMARY KEY (source, details_url, date, mode)
+);
+CREATE INDEX IF NOT EXISTS events_by_date ON events (date);
+"""
+
+# Airtable field name -> column
+FIELD_COLUMNS = {
+    "Event Name": "event_name",
+    "Location": "location",
+    "Venue URL": "venue_url",
+    "Image URL": "image_url",
+    "Summary": "summary",
+}
+
+
+def _sha256(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def content_fingerprint(details_txt: str, summary: str, image_url: str) -> str:
+    """Fingerprint of what a reader sees for an event: detail text, summary and image."""
+    return _sha256(details_txt, summary, image_url)
+
+
+def usable_summary(details_txt: str, summary: str) -> bool:
+    """False when the detail page or the OpenAI call failed."""
+    return bool(details_txt) and bool(summary) and summary not in PLACEHOLDER_SUMMARIES
+
+
+class EventStore:
+    def __init__(self, path=None):
+        self.path = path or os.getenv("EVENT_STORE_PATH", "events.db")
+        self.conn = sqlite3.connect(self.path)
+        self.conn.row_factory = sqlite3.Row
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Earlier layout had no mode or Airtable ids; it is only a cache, so start over
+            self.conn.execute("DROP TABLE IF EXISTS events")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _row(self, source: str, details_url: str, date: str, mode: str):
+        return self.conn.execute(
+            "SELECT * FROM events WHERE source = ? AND details_url = ? AND date = ? AND mode = ?",
+            (source, details_url, date, mode),
+        ).fetchone()
+
+    def cached_summary(self, source: str, details_url: str, details_txt: str):
+        """Stored summary for this event if its detail text is unchanged, else None."""
+        if not details_txt:
+            return None
+        placeholders = ", ".join("?" for _ in PLACEHOLDER_SUMMARIES)
+        row = self.conn.execute(
+            "SELECT summary FROM events WHERE source = ? AND details_url = ? AND details_hash = ?"
+            f" AND summary NOT IN ({placeholders}) LIMIT 1",
+            (source, details_url, _sha256(details_txt), *PLACEHOLDER_SUMMARIES),
+        ).fetchone()
+        return row["summary"] if row else None
+
+    def changed(self, source: str, date: str, fields: dict, details_txt: str, mode: str = ROWS) -> bool:
+        """True if this row is new in `mode` or its content differs."""
+        row = self._row(source, fields.get("Details URL"), date, mode)
+        fingerprint = content_fingerprint(details_txt, fields.get("Summary"), fields.get("Image URL"))
+        return row is None or row["fingerprint"] != fingerprint
+
+    def airtable_id(self, source: str, details_url: str, date: str, mode: str = ROWS):
+        """Airtable record id this row was uploaded as, or None."""
+        row = self._row(source, details_url, date, mode)
+        return row["airtable_id"] if row else None
+
+    def compact_event_id(self, source: str, details_url: str):
+        """Events-table record id of a show uploaded in compact mode, or None."""
+        row = self.conn.execute(
+            "SELECT event_airtable_id FROM events WHERE source = ? AND details_url = ? AND mode = ?"
+            " AND event_airtable_id IS NOT NULL ORDER BY updated_at DESC LIMIT 1",
+            (source, details_url, COMPACT),
+        ).fetchone()
+        return row["event_airtable_id"] if row else None
+
+    def has_summary(self, source: str, details_url: str, date: str = None, mode: str = ROWS) -> bool:
+        """True if a row of this event (one date, or any date) was saved with a real summary."""
+        query = "SELECT 1 FROM events WHERE source = ? AND details_url = ? AND mode = ? AND fingerprint != ?"
+        params = [source, details_url, mode, RETRY_FINGERPRINT]
+        if date:
+            query += " AND date = ?"
+            params.append(date)
+        return self.conn.execute(query + " LIMIT 1", params).fetchone() is not None
+
+    def dates(self, source: str, details_url: str, mode: str = ROWS) -> list:
+        """Dates stored for one event in `mode`, sorted."""
+        rows = self.conn.execute(
+            "SELECT date FROM events WHERE source = ? AND details_url = ? AND mode = ? ORDER BY date",
+            (source, details_url, mode),
+        ).fetchall()
+        return [row["date"] for row in rows]
+
+    def delete(self, source: str, details_url: str, date: str, mode: str = ROWS):
+        """Forgets one row, e.g. a date that was dropped from a show's run."""
+        self.conn.execute(
+            "DELETE FROM events WHERE source = ? AND details_url = ? AND date = ? AND mode = ?",
+            (source, details_url, date, mode),
+        )
+        self.conn.commit()
+
+    def save(self, source: str, date: str, fields: dict, details_txt: str, mode: str = ROWS,
+             airtable_id=None, event_airtable_id=None):
+        """Inserts or updates one event row. Call once Airtable has accepted it."""
+        now = datetime.now().isoformat(timespec="seconds")
+        values = {column: fields.get(name) for name, column in FIELD_COLUMNS.items()}
+        self.conn.execute(
+            """
+            INSERT INTO events (source, details_url, date, mode, event_name, location, venue_url,
+                                image_url, summary, details_hash, fingerprint, airtable_id,
+                                event_airtable_id, first_seen, updated_at)
+            VALUES (:source, :details_url, :date, :mode, :event_name, :location, :venue_url,
+                    :image_url, :summary, :details_hash, :fingerprint, :airtable_id,
+                    :event_airtable_id, :now, :now)
+            ON CONFLICT (source, details_url, date, mode) DO UPDATE SET
+                event_name = excluded.event_name,
+                location = excluded.location,
+                venue_url = excluded.venue_url,
+                image_url = excluded.image_url,
+                summary = excluded.summary,
+                details_hash = excluded.details_hash,
+                fingerprint = excluded.fingerprint,
+                airtable_id = COALESCE(excluded.airtable_id, events.airtable_id),
+                event_airtable_id = COALESCE(excluded.event_airtable_id, events.event_airtable_id),
+                updated_at = excluded.updated_at
+            """,
+            {
+                **values,
+                "source": source,
+                "details_url": fields.get("Details URL"),
+                "date": date,
+                "mode": mode,
+                "details_hash": _sha256(details_txt),
+                "fingerprint": (
+                    content_fingerprint(details_txt, fields.get("Summary"), fields.get("Image URL"))
+                    if usable_summary(details_txt, fields.get("Summary")) else RETRY_FINGERPRINT
+                ),
+                "airtable_id": airtable_id,
+                "event_airtable_id": event_airtable_id,
+                "now": now,
+            },
+        )
+        self.conn.commit()
+
+    def events_between(self, start: str, end: str) -> list:
+        """
+        Stored events with start <= date <= end (YYYY-MM-DD), ordered by date.
+        An event stored in both output modes is listed once (latest update wins).
+        """
+        rows = self.conn.execute(
+            "SELECT * FROM events WHERE date BETWEEN ? AND ? ORDER BY date, event_name, updated_at DESC",
+            (start, end),
+        ).fetchall()
+        events, seen = [], set()
+        for row in rows:
+            key = (row["source"], row["details_url"], row["date"])
+            if key not in seen:
+                seen.add(key)
+                events.append(dict(row))
+        return events
+
+    def events_on(self, date: str) -> list:
+        return self.events_between(date, date)
+
+
+def sync_row(store: EventStore, source: str, date: str, fields: dict, details_txt: str, upsert) -> bool:
+    """
+    Pushes one per-date row if it is new or changed. `upsert(fields, record_id)`
+    must PATCH `record_id` when given (else POST) and return the Airtable id, or None.
+    Returns True if Airtable accepted the row.
+
+    A row without a usable summary is still pushed (with the placeholder) unless
+    a good version was pushed before; either way it is retried next run.
+    """
+    name = fields.get("Event Name")
+    if not usable_summary(details_txt, fields.get("Summary")):
+        if store.has_summary(source, fields.get("Details URL"), date):
+            logging.warning(f"No usable summary for {name} on {date}, keeping the uploaded one")
+            return False
+        logging.warning(f"No usable summary for {name} on {date}, uploading placeholder and retrying next run")
+    if not store.changed(source, date, fields, details_txt):
+        logging.debug(f"Unchanged since last run, skipping upload: {name} on {date}")
+        return False
+    record_id = upsert(fields, store.airtable_id(source, fields.get("Details URL"), date))
+    if not record_id:
+        return False
+    store.save(source, date, fields, details_txt, airtable_id=record_id)
+    return True
+
+
+def sync_compact_event(store: EventStore, source: str, fields: dict, dates, details_txt: str,
+                       upsert_event, post_occurrences, delete_occurrences) -> bool:
+    """
+    Compact-mode counterpart of sync_row. If any date is new, changed or
+    dropped, the show's Events record is PATCHed (or POSTed the first time)
+    with its current date ranges. Occurrence rows are POSTed only for dates
+    that don't have one yet, and deleted for dates no longer listed.
+    `post_occurrences(event_id, dates)` returns {date: record id} and
+    `delete_occurrences(record_ids)` returns the deleted record ids; only
+    dates Airtable accepted are saved/forgotten, so the rest are retried.
+    Shows without a usable summary are handled as in sync_row.
+    """
+    name = fields.get("Event Name")
+    details_url = fields.get("Details URL")
+    if not usable_summary(details_txt, fields.get("Summary")):
+        if store.has_summary(source, details_url, mode=COMPACT):
+            logging.warning(f"No usable summary for {name}, keeping the uploaded one")
+            return False
+        logging.warning(f"No usable summary for {name}, uploading placeholder and retrying next run")
+    dates = sorted({to_date(d).isoformat() for d in dates})
+    changed_dates = [d for d in dates if store.changed(source, d, fields, details_txt, mode=COMPACT)]
+    dropped_dates = [d for d in store.dates(source, details_url, mode=COMPACT) if d not in dates]
+    if not changed_dates and not dropped_dates:
+        logging.debug(f"Unchanged since last run, skipping upload: {name}")
+        return False
+
+    event_id = upsert_event(build_compact_event(fields, dates), store.compact_event_id(source, details_url))
+    if not event_id:
+        return False
+
+    occurrence_ids = {d: store.airtable_id(source, details_url, d, mode=COMPACT) for d in changed_dates}
+    new_dates = [d for d, occurrence_id in occurrence_ids.items() if not occurrence_id]
+    if new_dates:
+        occurrence_ids.update(post_occurrences(event_id, new_dates))
+    for d, occurrence_id in occurrence_ids.items():
+        if occurrence_id:
+            store.save(source, d, fields, details_txt, mode=COMPACT,
+                       airtable_id=occurrence_id, event_airtable_id=event_id)
+
+    if dropped_dates:
+        dropped_ids = {d: store.airtable_id(source, details_url, d, mode=COMPACT) for d in dropped_dates}
+        deleted = set(delete_occurrences([i for i in dropped_ids.values() if i]))
+        for d, occurrence_id in dropped_ids.items():
+            if not occurrence_id or occurrence_id in deleted:
+                store.delete(source, details_url, d, mode=COMPACT)
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python3 event_store.py START_DATE [END_DATE]  (dates as YYYY-MM-DD)")
+        sys.exit(1)
+    start = sys.argv[1]
+    end = sys.argv[2] if len(sys.argv) > 2 else start
+    with EventStore() as store:
+        print(json.dumps(store.events_between(start, end), indent=2, ensure_ascii=False))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+export_events.py
+
+Exports the compact Airtable Events table (written by the scrapers'
+--compact mode) as a single JSON payload for the website: every event
+once, plus a date -> events lookup built with event_records.DateIndex.
+
+    python3 export_events.py                          # everything -> events.json
+    python3 export_events.py 2025-01-06 2025-01-12    # one date window
+    python3 export_events.py 2025-01-06 2025-01-12 week.json
+"""
+
+import json
+import os
+import sys
+
+import requests
+from dotenv import load_dotenv
+
+from event_records import DateIndex
+
+load_dotenv()
+
+AIRTABLE_API_KEY = os.getenv("AIRTABLE_API_KEY")
+AIRTABLE_BASE_ID = os.getenv("AIRTABLE_BASE_ID", "appMlyQoIVpWTzj79")
+AIRTABLE_EVENTS_TABLE_NAME = os.getenv("AIRTABLE_EVENTS_TABLE_NAME", "Events")
+EVENTS_URL = f"https://api.airtable.com/v0/{AIRTABLE_BASE_ID}/{AIRTABLE_EVENTS_TABLE_NAME}"
+
+
+def fetch_events(session=requests) -> list:
+    """Returns the fields of every record in the Events table, following Airtable's pagination."""
+    headers = {"Authorization": f"Bearer {AIRTABLE_API_KEY}"}
+    events = []
+    params = {}
+    while True:
+        response = session.get(EVENTS_URL, headers=headers, params=params, timeout=15)
+        response.raise_for_status()
+        payload = response.json()
+        events.extend(record["fields"] for record in payload.get("records", []))
+        if not payload.get("offset"):
+            return events
+        params = {"offset": payload["offset"]}
+
+
+def main(start=None, end=None, out_path="events.json"):
+    if not AIRTABLE_API_KEY:
+        raise ValueError("AIRTABLE_API_KEY not set. Define it in your environment or .env file.")
+    index = DateIndex(fetch_events())
+    payload = index.to_dict(start, end)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(payload['events'])} events over {len(payload['by_date'])} dates to {out_path}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    start = args[0] if len(args) > 0 else None
+    end = args[1] if len(args) > 1 else start
+    out_path = args[2] if len(args) > 2 else "events.json"
+    main(start, end, out_path)
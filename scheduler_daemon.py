@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+scheduler_daemon.py
+
+Long-running alternative to calling each scraper by hand. It keeps one
+OpenAI client, one Chromium instance, the scrapers' pooled HTTP sessions and
+the local event store warm, and runs every source on its own interval:
+
+- offi near-term window (next 7 days) is refreshed more often than the
+  far window (days 7-20).
+- each interval adapts: it halves when the source's listing changed since
+  the last run and grows by half when it didn't, within per-source bounds.
+  The first run after startup only records a baseline.
+
+Venues listed in venues.md that have no scraper yet are reported as
+unscheduled. A local status endpoint shows queue depth and last-run timings:
+
+    python3 scheduler_daemon.py [--port 8765] [--compact]
+    curl http://127.0.0.1:8765/status
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+from playwright.sync_api import sync_playwright
+
+import dance_events_chaillot
+import dance_events_theatre_de_la_ville
+import week_of_dance_events
+from event_store import EventStore
+from scheduling import HOUR, MINUTE, Scheduler, Source, domain_of, read_venues, serve_status
+
+
+def build_sources(summarizer, get_browser, store, compact=False) -> list:
+    def offi_window(offset_days, days):
+        def run():
+            start = (datetime.today() + timedelta(days=offset_days)).strftime("%d/%m/%Y")
+            return week_of_dance_events.main(start, days=days, summarizer=summarizer, store=store)
+        return run
+
+    return [
+        Source("offi-near", offi_window(0, 6), 1 * HOUR, 30 * MINUTE, 6 * HOUR, domain="offi.fr"),
+        Source("offi-far", offi_window(7, 13), 6 * HOUR, 3 * HOUR, 24 * HOUR, domain="offi.fr"),
+        Source(
+            "chaillot",
+            lambda: dance_events_chaillot.main(
+                compact=compact, summarizer=summarizer, browser=get_browser(), store=store
+            ),
+            6 * HOUR, 2 * HOUR, 48 * HOUR, domain="theatre-chaillot.fr",
+        ),
+        Source(
+            "theatre-de-la-ville",
+            lambda: dance_events_theatre_de_la_ville.main(compact=compact, summarizer=summarizer, store=store),
+            6 * HOUR, 2 * HOUR, 48 * HOUR, domain="theatredelaville-paris.com",
+        ),
+    ]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Run all Paris dance scrapers on adaptive schedules.")
+    arg_parser.add_argument("--port", type=int, default=8765, help="local status endpoint port")
+    arg_parser.add_argument("--compact", action="store_true", help="upload compact event records")
+    args = arg_parser.parse_args()
+
+    summarizer = dance_events_theatre_de_la_ville.DanceEventsSummarize()
+    store = EventStore()
+
+    with sync_playwright() as p:
+        browser = None
+
+        def get_browser():
+            # Relaunch Chromium only if it died since the last run
+            nonlocal browser
+            if browser is None or not browser.is_connected():
+                logging.debug("[scheduler] Launching Playwright browser...")
+                browser = p.chromium.launch(headless=True)
+            return browser
+
+        sources = build_sources(summarizer, get_browser, store, compact=args.compact)
+        covered = {s.domain for s in sources}
+        unscheduled = [(n, u) for n, u in read_venues() if domain_of(u) not in covered]
+        for name, url in unscheduled:
+            logging.info(f"[scheduler] No scraper yet for {name} ({url})")
+
+        scheduler = Scheduler(sources, unscheduled)
+        server = serve_status(scheduler, args.port)
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            logging.info("[scheduler] Shutting down.")
+        finally:
+            scheduler.stop()
+            server.shutdown()
+            if browser is not None:
+                browser.close()
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
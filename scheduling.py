@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+scheduling.py
+
+Scheduling pieces of scheduler_daemon.py that don't depend on the
+scrapers: adaptive per-source intervals, the run queue, the local status
+endpoint and venues.md parsing.
+"""
+
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+
+
+class Source:
+    """One schedulable scraper job and its adaptive interval."""
+
+    def __init__(self, name, run, interval, min_interval, max_interval, domain=None):
+        self.name = name
+        self.run = run  # callable returning a listing fingerprint, or None on failure
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.domain = domain
+        self.next_run = time.time()
+        self.fingerprint = None
+        self.runs = 0
+        self.changes = 0
+        self.last_started = None
+        self.last_duration = None
+        self.last_error = None
+
+    def adapt(self, fingerprint):
+        """Tightens the interval when the listing changed, relaxes it when it didn't."""
+        if fingerprint is None:
+            return  # failed run tells us nothing about the listing
+        if self.fingerprint is None:
+            self.fingerprint = fingerprint  # first successful run is the baseline, not a change
+            return
+        if fingerprint != self.fingerprint:
+            self.changes += 1
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        self.fingerprint = fingerprint
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "interval_seconds": round(self.interval),
+            "next_run": datetime.fromtimestamp(self.next_run).isoformat(timespec="seconds"),
+            "runs": self.runs,
+            "changes": self.changes,
+            "last_started": (
+                datetime.fromtimestamp(self.last_started).isoformat(timespec="seconds")
+                if self.last_started else None
+            ),
+            "last_duration_seconds": round(self.last_duration, 1) if self.last_duration is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+def read_venues(path="venues.md") -> list:
+    """Returns (name, url) pairs from venues.md."""
+    venues = []
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                match = re.search(r"https?://\S+", line)
+                if match:
+                    name = line[:match.start()].strip(" ,:\t")
+                    venues.append((name, match.group(0)))
+    except OSError as e:
+        logging.warning(f"Could not read {path}: {e}")
+    return venues
+
+
+def domain_of(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class Scheduler:
+    """Priority queue of sources keyed on their next run time."""
+
+    def __init__(self, sources, unscheduled_venues=()):
+        self.sources = sources
+        self.unscheduled_venues = list(unscheduled_venues)
+        self.running = None
+        self._lock = threading.Lock()
+        self._queue = [(s.next_run, i, s) for i, s in enumerate(sources)]
+        heapq.heapify(self._queue)
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            wait = self.run_due()
+            if wait > 0:
+                self._stop.wait(min(wait, 5))
+
+    def run_due(self) -> float:
+        """Runs the earliest source if it is due. Returns seconds until the next one is due."""
+        with self._lock:
+            next_run, _, _ = self._queue[0]
+            if next_run > time.time():
+                return next_run - time.time()
+            _, idx, source = heapq.heappop(self._queue)
+            self.running = source.name
+        self._run_one(source)
+        with self._lock:
+            self.running = None
+            heapq.heappush(self._queue, (source.next_run, idx, source))
+        return 0
+
+    def _run_one(self, source: Source):
+        logging.info(f"[scheduler] Running {source.name} (interval {source.interval / MINUTE:.0f} min)")
+        source.last_started = time.time()
+        fingerprint = None
+        try:
+            fingerprint = source.run()
+            source.last_error = None
+        except Exception as e:
+            logging.exception(f"[scheduler] {source.name} failed")
+            source.last_error = str(e)
+        source.last_duration = time.time() - source.last_started
+        source.runs += 1
+        source.adapt(fingerprint)
+        source.next_run = time.time() + source.interval
+        logging.info(
+            f"[scheduler] {source.name} done in {source.last_duration:.1f}s, "
+            f"next in {source.interval / MINUTE:.0f} min"
+        )
+
+    def status(self) -> dict:
+        now = time.time()
+        with self._lock:
+            queued = [s for _, _, s in self._queue]
+            return {
+                "now": datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+                "running": self.running,
+                "queue_depth": sum(1 for s in queued if s.next_run <= now),
+                "scheduled": len(queued),
+                "sources": [s.status() for s in sorted(self.sources, key=lambda s: s.next_run)],
+                "unscheduled_venues": [{"name": n, "url": u} for n, u in self.unscheduled_venues],
+            }
+
+
+def serve_status(scheduler: Scheduler, port: int) -> ThreadingHTTPServer:
+    """Starts the local JSON status endpoint on a background thread."""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/status"):
+                self.send_error(404)
+                return
+            body = json.dumps(scheduler.status(), indent=2).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.debug("[status] " + format % args)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(f"[scheduler] Status endpoint on http://127.0.0.1:{port}/status")
+    return server
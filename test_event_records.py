@@ -0,0 +1,111 @@
+from datetime import date, datetime
+
+from event_records import (
+    DateIndex,
+    build_compact_event,
+    date_ranges,
+    format_date_ranges,
+    listing_fingerprint,
+    occurrence_rows,
+    parse_date_ranges,
+    window_fingerprint,
+)
+
+
+def test_date_ranges_collapses_consecutive_days():
+    dates = ["2025-01-08", date(2025, 1, 6), datetime(2025, 1, 7, 20, 30), "2025-01-10", "2025-01-06"]
+    assert date_ranges(dates) == [
+        (date(2025, 1, 6), date(2025, 1, 8)),
+        (date(2025, 1, 10), date(2025, 1, 10)),
+    ]
+
+
+def test_date_ranges_spans_month_boundary():
+    assert date_ranges(["2025-01-31", "2025-02-01"]) == [(date(2025, 1, 31), date(2025, 2, 1))]
+
+
+def test_date_ranges_empty():
+    assert date_ranges([]) == []
+
+
+def test_format_and_parse_date_ranges_round_trip():
+    ranges = [(date(2025, 1, 6), date(2025, 1, 8)), (date(2025, 1, 10), date(2025, 1, 10))]
+    formatted = format_date_ranges(ranges)
+    assert formatted == "2025-01-06/2025-01-08, 2025-01-10"
+    assert parse_date_ranges(formatted) == ranges
+    assert parse_date_ranges("") == []
+
+
+def test_build_compact_event_drops_date_and_adds_ranges():
+    event = build_compact_event({"Event Name": "A", "Date": "2025-01-06"}, ["2025-01-07", "2025-01-06"])
+    assert event == {
+        "Event Name": "A",
+        "Date Ranges": "2025-01-06/2025-01-07",
+        "First Date": "2025-01-06",
+        "Last Date": "2025-01-07",
+    }
+
+
+def test_occurrence_rows_link_each_date_once():
+    assert occurrence_rows("rec1", ["2025-01-07", "2025-01-06", "2025-01-07"]) == [
+        {"Date": "2025-01-06", "Event": ["rec1"]},
+        {"Date": "2025-01-07", "Event": ["rec1"]},
+    ]
+
+
+def test_listing_fingerprint_ignores_order():
+    assert listing_fingerprint(["a", "b"]) == listing_fingerprint(["b", "a"])
+    assert listing_fingerprint(["a", "b"]) != listing_fingerprint(["a", "c"])
+
+
+def _window(start_day, end_day, listing):
+    """(date, url) pairs a scrape of days start_day..end_day (January 2025) would see."""
+    return [
+        (f"2025-01-{day:02d}", url)
+        for day in range(start_day, end_day + 1)
+        for url, days in listing.items()
+        if day in days
+    ]
+
+
+def test_window_fingerprint_survives_one_day_shift():
+    listing = {"https://www.offi.fr/giselle": range(10, 13), "https://www.offi.fr/boléro": range(1, 31)}
+    assert window_fingerprint(_window(7, 13, listing)) == window_fingerprint(_window(8, 14, listing))
+
+
+def test_window_fingerprint_changes_when_a_show_is_added():
+    listing = {"https://www.offi.fr/giselle": range(10, 13)}
+    before = window_fingerprint(_window(7, 13, listing))
+    listing["https://www.offi.fr/new"] = [9]
+    assert window_fingerprint(_window(7, 13, listing)) != before
+
+
+def _index():
+    return DateIndex([
+        {"Event Name": "A", "Date Ranges": "2025-01-06/2025-01-08, 2025-01-10"},
+        {"Event Name": "B", "Date Ranges": "2025-01-08"},
+    ])
+
+
+def test_events_on():
+    index = _index()
+    assert [e["Event Name"] for e in index.events_on("2025-01-08")] == ["A", "B"]
+    assert [e["Event Name"] for e in index.events_on(date(2025, 1, 10))] == ["A"]
+    assert index.events_on("2025-01-09") == []
+
+
+def test_events_between_lists_each_event_once():
+    index = _index()
+    assert [e["Event Name"] for e in index.events_between("2025-01-06", "2025-01-12")] == ["A", "B"]
+    assert [e["Event Name"] for e in index.events_between("2025-01-09", "2025-01-10")] == ["A"]
+    assert index.events_between("2025-02-01", "2025-02-28") == []
+
+
+def test_to_dict_window_reindexes_events():
+    payload = _index().to_dict("2025-01-08", "2025-01-08")
+    assert [e["Event Name"] for e in payload["events"]] == ["A", "B"]
+    assert payload["by_date"] == {"2025-01-08": [0, 1]}
+
+    payload = _index().to_dict("2025-01-10", "2025-01-10")
+    assert [e["Event Name"] for e in payload["events"]] == ["A"]
+    assert payload["by_date"] == {"2025-01-10": [0]}
@@ -0,0 +1,242 @@
+import pytest
+
+from event_store import COMPACT, EventStore, sync_compact_event, sync_row
+
+FIELDS = {
+    "Event Name": "Giselle",
+    "Location": "Salle Jean Vilar",
+    "Venue URL": "https://theatre-chaillot.fr",
+    "Image URL": "https://theatre-chaillot.fr/giselle.jpg",
+    "Summary": "A ballet.",
+    "Details URL": "https://theatre-chaillot.fr/fr/giselle",
+}
+DETAILS = "Giselle, ballet en deux actes."
+
+
+@pytest.fixture
+def store():
+    with EventStore(":memory:") as store:
+        yield store
+
+
+def test_new_row_is_changed_until_saved(store):
+    assert store.changed("chaillot", "2025-01-06", FIELDS, DETAILS)
+    store.save("chaillot", "2025-01-06", FIELDS, DETAILS, airtable_id="rec1")
+    assert not store.changed("chaillot", "2025-01-06", FIELDS, DETAILS)
+    assert store.changed("chaillot", "2025-01-06", {**FIELDS, "Summary": "Another ballet."}, DETAILS)
+    assert store.changed("chaillot", "2025-01-06", {**FIELDS, "Image URL": "other.jpg"}, DETAILS)
+    assert store.changed("chaillot", "2025-01-06", FIELDS, DETAILS + " Nouveau.")
+    assert store.changed("chaillot", "2025-01-07", FIELDS, DETAILS)
+
+
+def test_output_modes_are_tracked_separately(store):
+    store.save("chaillot", "2025-01-06", FIELDS, DETAILS, airtable_id="rec1")
+    assert store.changed("chaillot", "2025-01-06", FIELDS, DETAILS, mode=COMPACT)
+    store.save("chaillot", "2025-01-06", FIELDS, DETAILS, mode=COMPACT, airtable_id="occ1")
+    assert not store.changed("chaillot", "2025-01-06", FIELDS, DETAILS, mode=COMPACT)
+    assert store.airtable_id("chaillot", FIELDS["Details URL"], "2025-01-06") == "rec1"
+    assert store.airtable_id("chaillot", FIELDS["Details URL"], "2025-01-06", mode=COMPACT) == "occ1"
+
+
+def test_save_keeps_airtable_id_when_not_given(store):
+    store.save("chaillot", "2025-01-06", FIELDS, DETAILS, airtable_id="rec1")
+    store.save("chaillot", "2025-01-06", {**FIELDS, "Summary": "Updated."}, DETAILS)
+    assert store.airtable_id("chaillot", FIELDS["Details URL"], "2025-01-06") == "rec1"
+
+
+def test_cached_summary_needs_matching_details(store):
+    assert store.cached_summary("chaillot", FIELDS["Details URL"], DETAILS) is None
+    store.save("chaillot", "2025-01-06", FIELDS, DETAILS)
+    assert store.cached_summary("chaillot", FIELDS["Details URL"], DETAILS) == "A ballet."
+    assert store.cached_summary("chaillot", FIELDS["Details URL"], DETAILS + " Nouveau.") is None
+    assert store.cached_summary("offi", FIELDS["Details URL"], DETAILS) is None
+    assert store.cached_summary("chaillot", FIELDS["Details URL"], "") is None
+
+
+@pytest.mark.parametrize("summary", ["Error in generating summary.", "No summary available."])
+def test_placeholder_summaries_are_never_cached(store, summary):
+    store.save("chaillot", "2025-01-06", {**FIELDS, "Summary": summary}, DETAILS)
+    assert store.cached_summary("chaillot", FIELDS["Details URL"], DETAILS) is None
+
+
+def test_events_between_lists_each_event_once(store):
+    store.save("chaillot", "2025-01-06", FIELDS, DETAILS)
+    store.save("chaillot", "2025-01-06", FIELDS, DETAILS, mode=COMPACT)
+    store.save("chaillot", "2025-01-08", FIELDS, DETAILS)
+    store.save("offi", "2025-02-01", {**FIELDS, "Event Name": "Later"}, DETAILS)
+    assert [e["date"] for e in store.events_between("2025-01-01", "2025-01-31")] == ["2025-01-06", "2025-01-08"]
+    assert [e["event_name"] for e in store.events_on("2025-02-01")] == ["Later"]
+
+
+class FakeAirtable:
+    """Records upserts; hands out sequential record ids."""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def upsert(self, fields, record_id):
+        self.calls.append((dict(fields), record_id))
+        if self.fail:
+            return None
+        return record_id or f"rec{len(self.calls)}"
+
+
+def delete_all(record_ids):
+    return list(record_ids)
+
+
+def test_sync_row_posts_then_patches_changes(store):
+    airtable = FakeAirtable()
+    assert sync_row(store, "chaillot", "2025-01-06", FIELDS, DETAILS, airtable.upsert)
+    assert not sync_row(store, "chaillot", "2025-01-06", FIELDS, DETAILS, airtable.upsert)
+    assert sync_row(store, "chaillot", "2025-01-06", {**FIELDS, "Summary": "Updated."}, DETAILS, airtable.upsert)
+    assert [record_id for _, record_id in airtable.calls] == [None, "rec1"]
+
+
+def test_sync_row_retries_after_failed_upload(store):
+    assert not sync_row(store, "chaillot", "2025-01-06", FIELDS, DETAILS, FakeAirtable(fail=True).upsert)
+    assert store.changed("chaillot", "2025-01-06", FIELDS, DETAILS)
+
+
+@pytest.mark.parametrize("summary, details", [
+    ("Error in generating summary.", DETAILS),
+    ("No summary available.", DETAILS),
+    ("No summary available.", ""),
+])
+def test_sync_row_keeps_good_row_over_failed_summary(store, summary, details):
+    store.save("chaillot", "2025-01-06", FIELDS, DETAILS, airtable_id="rec1")
+    airtable = FakeAirtable()
+    assert not sync_row(store, "chaillot", "2025-01-06", {**FIELDS, "Summary": summary}, details, airtable.upsert)
+    assert airtable.calls == []
+    assert store.cached_summary("chaillot", FIELDS["Details URL"], DETAILS) == "A ballet."
+
+
+@pytest.mark.parametrize("summary, details", [
+    ("Error in generating summary.", DETAILS),
+    ("No summary available.", ""),
+])
+def test_sync_row_uploads_placeholder_and_retries(store, summary, details):
+    airtable = FakeAirtable()
+    placeholder = {**FIELDS, "Summary": summary}
+    assert sync_row(store, "chaillot", "2025-01-06", placeholder, details, airtable.upsert)
+    assert airtable.calls == [(placeholder, None)]
+    assert store.cached_summary("chaillot", FIELDS["Details URL"], details) is None
+
+    # Still retried (as a PATCH) on the next run, until a real summary replaces it
+    assert store.changed("chaillot", "2025-01-06", placeholder, details)
+    assert sync_row(store, "chaillot", "2025-01-06", FIELDS, DETAILS, airtable.upsert)
+    assert airtable.calls[-1] == (FIELDS, "rec1")
+    assert not store.changed("chaillot", "2025-01-06", FIELDS, DETAILS)
+
+
+def test_sync_compact_event_uploads_placeholder_and_retries(store):
+    events = FakeAirtable()
+    post = lambda event_id, dates: {d: f"occ-{d}" for d in dates}
+    placeholder = {**FIELDS, "Summary": "Error in generating summary."}
+    assert sync_compact_event(store, "chaillot", placeholder, ["2025-01-06"], DETAILS, events.upsert, post, delete_all)
+    assert sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06"], DETAILS, events.upsert, post, delete_all)
+    assert events.calls[-1][1] == "rec1"
+    # Once a real summary is up, a later failure doesn't replace it
+    assert not sync_compact_event(store, "chaillot", placeholder, ["2025-01-06"], DETAILS,
+                                  events.upsert, post, delete_all)
+
+
+def test_sync_compact_event_patches_event_and_posts_only_new_occurrences(store):
+    events = FakeAirtable()
+    posted = []
+
+    def post_occurrences(event_id, dates):
+        posted.append((event_id, list(dates)))
+        return {d: f"occ-{d}" for d in dates}
+
+    assert sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07"], DETAILS,
+                              events.upsert, post_occurrences, delete_all)
+    assert events.calls[0][1] is None
+    assert events.calls[0][0]["Date Ranges"] == "2025-01-06/2025-01-07"
+    assert posted == [("rec1", ["2025-01-06", "2025-01-07"])]
+
+    # Unchanged: nothing is pushed
+    assert not sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07"], DETAILS,
+                                  events.upsert, post_occurrences, delete_all)
+
+    # A new date: the event record is patched with the wider range, one occurrence is added
+    assert sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07", "2025-01-08"], DETAILS,
+                              events.upsert, post_occurrences, delete_all)
+    assert events.calls[1][1] == "rec1"
+    assert events.calls[1][0]["Date Ranges"] == "2025-01-06/2025-01-08"
+    assert posted[-1] == ("rec1", ["2025-01-08"])
+
+    # Changed summary: the event is patched, no occurrence rows are reposted
+    assert sync_compact_event(store, "chaillot", {**FIELDS, "Summary": "Updated."},
+                              ["2025-01-06", "2025-01-07", "2025-01-08"], DETAILS,
+                              events.upsert, post_occurrences, delete_all)
+    assert events.calls[2][1] == "rec1"
+    assert len(posted) == 2
+
+
+def test_sync_compact_event_saves_only_accepted_occurrences(store):
+    events = FakeAirtable()
+
+    def post_half(event_id, dates):
+        return {dates[0]: "occ-first"}
+
+    sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07"], DETAILS,
+                       events.upsert, post_half, delete_all)
+    assert not store.changed("chaillot", "2025-01-06", FIELDS, DETAILS, mode=COMPACT)
+    assert store.changed("chaillot", "2025-01-07", FIELDS, DETAILS, mode=COMPACT)
+
+    retried = []
+    sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07"], DETAILS, events.upsert,
+                       lambda event_id, dates: retried.extend(dates) or {d: "occ-retry" for d in dates},
+                       delete_all)
+    assert retried == ["2025-01-07"]
+    assert events.calls[-1][1] == "rec1"
+
+
+def test_sync_compact_event_ignores_rows_written_in_per_date_mode(store):
+    sync_row(store, "chaillot", "2025-01-06", FIELDS, DETAILS, FakeAirtable().upsert)
+    events = FakeAirtable()
+    assert sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06"], DETAILS, events.upsert,
+                              lambda event_id, dates: {d: "occ" for d in dates}, delete_all)
+    assert events.calls[0][1] is None
+
+
+def test_sync_compact_event_handles_dropped_dates(store):
+    events = FakeAirtable()
+    post = lambda event_id, dates: {d: f"occ-{d}" for d in dates}
+    deleted = []
+    sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07", "2025-01-08"], DETAILS,
+                       events.upsert, post, delete_all)
+
+    def delete_some(record_ids):
+        deleted.extend(record_ids)
+        return record_ids
+
+    assert sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07"], DETAILS,
+                              events.upsert, post, delete_some)
+    assert events.calls[-1][1] == "rec1"
+    assert events.calls[-1][0]["Date Ranges"] == "2025-01-06/2025-01-07"
+    assert events.calls[-1][0]["Last Date"] == "2025-01-07"
+    assert deleted == ["occ-2025-01-08"]
+    assert store.dates("chaillot", FIELDS["Details URL"], mode=COMPACT) == ["2025-01-06", "2025-01-07"]
+
+    # Nothing left to do on the next run
+    assert not sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07"], DETAILS,
+                                  events.upsert, post, delete_some)
+
+
+def test_sync_compact_event_retries_failed_deletes(store):
+    events = FakeAirtable()
+    post = lambda event_id, dates: {d: f"occ-{d}" for d in dates}
+    sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06", "2025-01-07"], DETAILS,
+                       events.upsert, post, delete_all)
+
+    sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06"], DETAILS, events.upsert, post, lambda ids: [])
+    assert store.dates("chaillot", FIELDS["Details URL"], mode=COMPACT) == ["2025-01-06", "2025-01-07"]
+
+    retried = []
+    assert sync_compact_event(store, "chaillot", FIELDS, ["2025-01-06"], DETAILS, events.upsert, post,
+                              lambda ids: retried.extend(ids) or ids)
+    assert retried == ["occ-2025-01-07"]
+    assert store.dates("chaillot", FIELDS["Details URL"], mode=COMPACT) == ["2025-01-06"]
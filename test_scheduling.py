@@ -0,0 +1,123 @@
+import json
+import time
+import urllib.request
+
+from scheduling import Scheduler, Source, domain_of, read_venues, serve_status
+
+
+def _source(name="s", fingerprints=(), interval=100, min_interval=10, max_interval=1000):
+    results = iter(fingerprints)
+    return Source(name, lambda: next(results), interval, min_interval, max_interval)
+
+
+def test_first_fingerprint_is_a_baseline():
+    source = _source()
+    source.adapt("a")
+    assert source.interval == 100
+    assert source.changes == 0
+
+
+def test_adapt_tightens_on_change_and_relaxes_when_unchanged():
+    source = _source()
+    source.adapt("a")
+    source.adapt("b")
+    assert source.interval == 50
+    assert source.changes == 1
+    source.adapt("b")
+    assert source.interval == 75
+
+
+def test_adapt_respects_bounds():
+    source = _source(interval=100, min_interval=40, max_interval=120)
+    source.adapt("a")
+    source.adapt("b")
+    source.adapt("c")
+    assert source.interval == 40
+    for _ in range(5):
+        source.adapt("c")
+    assert source.interval == 120
+
+
+def test_adapt_ignores_failed_runs():
+    source = _source()
+    source.adapt("a")
+    source.adapt(None)
+    assert source.interval == 100
+    assert source.fingerprint == "a"
+
+
+def test_run_due_runs_earliest_source_first():
+    order = []
+    now = time.time()
+    late = Source("late", lambda: order.append("late"), 100, 10, 1000)
+    early = Source("early", lambda: order.append("early"), 100, 10, 1000)
+    late.next_run, early.next_run = now - 1, now - 10
+    scheduler = Scheduler([late, early])
+
+    assert scheduler.run_due() == 0
+    assert scheduler.run_due() == 0
+    assert order == ["early", "late"]
+    # both were rescheduled into the future
+    assert scheduler.run_due() > 0
+
+
+def test_failing_source_is_recorded_and_rescheduled():
+    def boom():
+        raise RuntimeError("listing down")
+
+    source = Source("broken", boom, 100, 10, 1000)
+    scheduler = Scheduler([source])
+    scheduler.run_due()
+    assert source.last_error == "listing down"
+    assert source.runs == 1
+    assert source.next_run > time.time()
+    assert scheduler.status()["running"] is None
+
+
+def test_status_reports_queue_depth_and_timings():
+    due = _source("due", fingerprints=["a"])
+    later = _source("later")
+    later.next_run = time.time() + 1000
+    scheduler = Scheduler([due, later], [("Atelier de Paris", "https://www.atelierdeparis.org/")])
+    assert scheduler.status()["queue_depth"] == 1
+
+    scheduler.run_due()
+    status = scheduler.status()
+    assert status["queue_depth"] == 0
+    assert status["scheduled"] == 2
+    ran = next(s for s in status["sources"] if s["name"] == "due")
+    assert ran["runs"] == 1
+    assert ran["last_duration_seconds"] is not None
+    assert status["unscheduled_venues"] == [{"name": "Atelier de Paris", "url": "https://www.atelierdeparis.org/"}]
+
+
+def test_status_endpoint_serves_json():
+    scheduler = Scheduler([_source()])
+    server = serve_status(scheduler, 0)
+    try:
+        port = server.server_address[1]
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/status", timeout=5) as response:
+            assert json.loads(response.read())["scheduled"] == 1
+    finally:
+        server.shutdown()
+
+
+def test_read_venues_parses_comma_and_colon_lines(tmp_path):
+    venues_md = tmp_path / "venues.md"
+    venues_md.write_text(
+        "# list of paris venues\n"
+        "Théâtre de la ville, https://www.theatredelaville-paris.com/fr/danse\n"
+        "Palais Garnier: https://www.operadeparis.fr/en/visits/palais-garnier\n"
+        "\n",
+        encoding="utf-8",
+    )
+    assert read_venues(str(venues_md)) == [
+        ("Théâtre de la ville", "https://www.theatredelaville-paris.com/fr/danse"),
+        ("Palais Garnier", "https://www.operadeparis.fr/en/visits/palais-garnier"),
+    ]
+    assert read_venues(str(tmp_path / "missing.md")) == []
+
+
+def test_domain_of_strips_www():
+    assert domain_of("https://www.theatredelaville-paris.com/fr") == "theatredelaville-paris.com"
+    assert domain_of("https://theatre-chaillot.fr/fr/programmation") == "theatre-chaillot.fr"
@@ -1,13 +1,20 @@
 # this scrapes a week's worth of events and puts them into the airtable. 
 # to set a specific date, do it like this: python3 week_of_dance_events.py 16/06/2024 
 # (where you list the day first, month second, and year last) 
+# an optional second argument sets how many days to scrape: python3 week_of_dance_events.py 16/06/2024 7
 
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import os
-import openai
 import locale
+from dotenv import load_dotenv
+from openai import OpenAI
+
+from event_records import window_fingerprint
+from event_store import EventStore, sync_row
+
+load_dotenv()
 
 # Set locale to French
 locale.setlocale(locale.LC_TIME, 'fr_FR.UTF-8')
@@ -24,15 +31,19 @@ headers = {
     "Content-Type": "application/json"
 }
 
-# Set the API key directly
-raise Exception("The 'openai.api_key' option isn't read in the client API. You will need to pass it when you instantiate the client, e.g. 'OpenAI(api_key=os.getenv('OPENAI_API_KEY'))'")
+# One pooled HTTP session for every request (keeps TCP/TLS connections alive)
+session = requests.Session()
+
+# Name of this scraper in the local event store
+STORE_SOURCE = "offi"
 
 class DanceEventsSummarize:
     def __init__(self):
-        # Directly use the API key from the environment
-        raise Exception("The 'openai.api_key' option isn't read in the client API. You will need to pass it when you instantiate the client, e.g. 'OpenAI(api_key=os.getenv('OPENAI_API_KEY'))'")
-        if not openai.api_key:
+        # Use the API key from the environment or .env
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
             raise ValueError("OpenAI API key not set. Please set the 'OPENAI_API_KEY' environment variable.")
+        self.client = OpenAI(api_key=api_key)
 
 
 # this is the summarizing AI. It takes the scraped detail page text as input. 
@@ -46,7 +57,7 @@ class DanceEventsSummarize:
             "content": f"Here is the text from the website: {details_txt}"
         }
         try:
-            response = openai.chat.completions.create(
+            response = self.client.chat.completions.create(
                 model="gpt-4o",  # Ensure you have access to this model
                 messages=[system_message, user_message],
                 max_tokens=500,
@@ -62,7 +73,7 @@ class DanceEventsSummarize:
 def fetch_event_details(url):
     if not url.startswith('http'):
         url = "https://www.offi.fr" + url
-    response = requests.get(url)
+    response = session.get(url, timeout=15)
     soup = BeautifulSoup(response.content, 'html.parser')
     
     # Extract text
@@ -85,7 +96,7 @@ def fetch_event_details(url):
 def fetch_venue_website(url):
     if not url.startswith('http'):
         url = "https://www.offi.fr" + url
-    response = requests.get(url)
+    response = session.get(url, timeout=15)
     soup = BeautifulSoup(response.content, 'html.parser')
     venue_link_tag = None
     links = soup.find_all("a")
@@ -103,16 +114,34 @@ def fetch_venue_website(url):
         venue_url = None
     return venue_url
 
-# Function to upload event to Airtable
-def upload_to_airtable(data):
-    response = requests.post(API_URL, headers=headers, json={"fields": data})
-    return response.json()
+# Function to upload event to Airtable (or update record_id in place, if we uploaded it before)
+# a timeout or bad response only fails this one event, not the whole window
+def upload_to_airtable(data, record_id=None):
+    try:
+        if record_id:
+            response = session.patch(f"{API_URL}/{record_id}", headers=headers, json={"fields": data}, timeout=15)
+            if response.status_code != 404:  # deleted in Airtable: upload it again
+                return response.json()
+        response = session.post(API_URL, headers=headers, json={"fields": data}, timeout=15)
+        return response.json()
+    except Exception as e:
+        print(f"Error uploading to Airtable: {e}")
+        return {"error": str(e)}
+
+# upsert callback for event_store.sync_row: returns the Airtable record id, or None
+def upsert_to_airtable(fields, record_id):
+    result = upload_to_airtable(fields, record_id)
+    print(result)
+    return result.get("id")
 
 def get_date_url(date):
     return f"https://www.offi.fr/theatre/operas-ballets-danse.html?criterion_DateDebut={date}&criterion_DateFin={date}"
 
-def main(start_date=None):
-    summarizer = DanceEventsSummarize()  # Create an instance of the class
+def main(start_date=None, days=20, summarizer=None, store=None):
+    # returns a fingerprint of the listings seen, so a scheduler can tell if they changed
+    summarizer = summarizer or DanceEventsSummarize()  # Create an instance of the class (or reuse one)
+    # the local event store lets us skip events that haven't changed since the last run
+    store = store or EventStore()
 
     # Use provided start_date or default to today's date
     if start_date:
@@ -120,12 +149,14 @@ def main(start_date=None):
     else:
         start_date = datetime.today()
 
-    end_date = start_date + timedelta(days=20)
+    end_date = start_date + timedelta(days=days)
+    seen = []
 
     while start_date <= end_date:
         formatted_date = start_date.strftime("%-d %B %Y")  # Long-form French date format
+        iso_date = start_date.strftime("%Y-%m-%d")  # the store indexes by YYYY-MM-DD
         date_url = get_date_url(start_date.strftime("%d/%m/%Y"))
-        response = requests.get(date_url)
+        response = session.get(date_url, timeout=15)
         soup = BeautifulSoup(response.content, 'html.parser')
         entries = soup.find_all("div", {"class": "mini-fiche-details d-flex has-padding-20"})
 
@@ -136,10 +167,14 @@ def main(start_date=None):
             details_url = entry.find("a", {"itemprop": "url"})["href"]
             if not details_url.startswith('http'):
                 details_url = "https://www.offi.fr" + details_url
+            seen.append((iso_date, details_url))
 
             details_txt, location_url, entry_name, venue_name = fetch_event_details(details_url)
             venue_url = fetch_venue_website(location_url)
-            summary_txt = summarizer.get_completion(details_txt)
+            # the same show is listed on many days; only summarize when its page changed
+            summary_txt = store.cached_summary(STORE_SOURCE, details_url, details_txt)
+            if summary_txt is None:
+                summary_txt = summarizer.get_completion(details_txt)
 
             # Prepare data for Airtable
             event_data = {
@@ -152,13 +187,15 @@ def main(start_date=None):
                 "Summary": summary_txt
             }
 
-            # Upload to Airtable
-            result = upload_to_airtable(event_data)
-            print(result)
+            # Upload to Airtable, only if new or changed since the last run
+            sync_row(store, STORE_SOURCE, iso_date, event_data, details_txt, upsert_to_airtable)
 
         start_date += timedelta(days=1)
 
+    return window_fingerprint(seen)
+
 if __name__ == "__main__":
     import sys
     start_date = sys.argv[1] if len(sys.argv) > 1 else None
-    main(start_date)
\ No newline at end of file
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    main(start_date, days)
\ No newline at end of file